@@ -91,8 +91,8 @@ class CskyEventGenerator():
         if len(path_sig_tail) > 0:
             path_sig_tail = '_' + path_sig_tail
 
-        ana_dir = cy.utils.ensure_dir(Defaults.NUXGAL_ANA_DIR.format(nyear=N_yr + path_sig_tail, galaxyName=self.galaxyName, emin=Ebinmin, emax=Ebinmax))
-        template_dir = cy.utils.ensure_dir(Defaults.NUXGAL_TEMPLATE_DIR.format(nyear=N_yr + path_sig_tail, galaxyName=self.galaxyName, emin=Ebinmin, emax=Ebinmax))
+        ana_dir = cy.utils.ensure_dir(Defaults.ana_dir(N_yr + path_sig_tail, self.galaxyName, Ebinmin, Ebinmax))
+        template_dir = cy.utils.ensure_dir(Defaults.template_dir(N_yr + path_sig_tail, self.galaxyName, Ebinmin, Ebinmax))
 
         self.ana = cy.get_analysis(cy.selections.repo, version, self.dataspec, dir=ana_dir, analysis_region_template=~self.density_nu.mask)
         # temporary fix to avoid cluster file transfer problem
@@ -276,6 +276,6 @@ class CskyEventGenerator():
                 #else:
                 #    weights = np.ones(pixels.size)
                 countsmap[i, pixels] += 1
-        countsmap[:, Defaults.idx_muon] = 0
+        countsmap[:, Defaults.idx_muon_mask] = 0
         #countsmap[:, self.density_nu==0] = 0
         return countsmap, ninj_ebin
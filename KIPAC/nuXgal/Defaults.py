@@ -1,6 +1,7 @@
 """Default values for analysis parameters"""
 
 import os
+import functools
 
 import numpy as np
 
@@ -18,6 +19,9 @@ DT_DAYS = 333           # Length of run1
 DT_SECONDS = 28771200   # 333 * 86400
 M2_TO_CM2 = 1e4         # Conversion for effective area
 
+SHT_NTHREADS = 1        # Threads used for spherical harmonic transforms when ducc0 is installed
+ALM_ITER = 3            # Jacobi iterations of map2alm, as healpy. The models must be recomputed if changed
+
 
 
 # Directories and file names
@@ -25,19 +29,33 @@ if 'NUXGAL_DIR' in os.environ:
     NUXGAL_DIR = os.environ['NUXGAL_DIR']
 else:
     NUXGAL_DIR = os.path.dirname(__file__)
-print("Using %s for NUXGAL_DIR" % NUXGAL_DIR)
-
-# Directories
-NUXGAL_ANCIL_DIR = os.path.join(NUXGAL_DIR, 'data', 'ancil')
-NUXGAL_IRF_DIR = os.path.join(NUXGAL_DIR, 'data', 'irfs')
-NUXGAL_DATA_DIR = os.path.join(NUXGAL_DIR, 'data', 'data')
-NUXGAL_SYNTHETICDATA_DIR = os.path.join(NUXGAL_DIR, 'syntheticData')
-NUXGAL_PLOT_DIR = os.path.join(NUXGAL_DIR, 'plots')
-TESTFIG_DIR = os.path.join(NUXGAL_PLOT_DIR, 'test')
-#NUXGAL_ANA_DIR = os.path.join(NUXGAL_DIR, 'data', 'ana')
+if VERBOSE:
+    print("Using %s for NUXGAL_DIR" % NUXGAL_DIR)
+
+# Directories, relative to NUXGAL_DIR
+_REL_PATHS = (
+    ('ANCIL', ('data', 'ancil')),
+    ('IRF', ('data', 'irfs')),
+    ('DATA', ('data', 'data')),
+    ('SYNTHETICDATA', ('syntheticData',)),
+    ('PLOT', ('plots',)),
+    ('TESTFIG', ('plots', 'test')),
+    #('ANA_ROOT', ('data', 'ana')),
+    ('ANA_ROOT', ('ana',)),
+    ('TEMPLATE_ROOT', ('ana', 'templates')),
+)
+PATHS = {key: os.path.join(NUXGAL_DIR, *parts) for key, parts in _REL_PATHS}
+
+# Aliases for the individual directories
+NUXGAL_ANCIL_DIR = PATHS['ANCIL']
+NUXGAL_IRF_DIR = PATHS['IRF']
+NUXGAL_DATA_DIR = PATHS['DATA']
+NUXGAL_SYNTHETICDATA_DIR = PATHS['SYNTHETICDATA']
+NUXGAL_PLOT_DIR = PATHS['PLOT']
+TESTFIG_DIR = PATHS['TESTFIG']
 #NUXGAL_ANA_ROOT = '/data/user/dguevel/nuXgal/ana'
-NUXGAL_ANA_ROOT = os.path.join(NUXGAL_DIR, 'ana')
-NUXGAL_TEMPLATE_ROOT = os.path.join(NUXGAL_ANA_ROOT, 'templates')
+NUXGAL_ANA_ROOT = PATHS['ANA_ROOT']
+NUXGAL_TEMPLATE_ROOT = PATHS['TEMPLATE_ROOT']
 NUXGAL_ANA_DIR = os.path.join(NUXGAL_ANA_ROOT, '{nyear}_{galaxyName}_ebin{emin}-{emax}')
 NUXGAL_TEMPLATE_DIR = os.path.join(NUXGAL_TEMPLATE_ROOT, '{nyear}_{galaxyName}_ebin{emin}-{emax}')
 NUXGAL_ANA_FORMAT = os.path.join(NUXGAL_ANA_DIR, 'NT86v5.subanalysis.version-005-p01.npy')
@@ -76,6 +94,25 @@ SYNTHETIC_TS_SIGNAL_FORMAT = os.path.join(NUXGAL_SYNTHETICDATA_DIR, 'TS_{f_diff}
 CORNER_PLOT_FORMAT = os.path.join(NUXGAL_SYNTHETICDATA_DIR, 'corner_{galaxyName}_{nyear}.h5')
 
 
+# Memoized formatting of the templates that are filled in repeatedly, e.g. for every trial
+@functools.lru_cache(maxsize=4096)
+def ana_dir(nyear, galaxyName, emin, emax):
+    """Return NUXGAL_ANA_DIR for a given sample and energy bin range"""
+    return NUXGAL_ANA_DIR.format(nyear=nyear, galaxyName=galaxyName, emin=emin, emax=emax)
+
+
+@functools.lru_cache(maxsize=4096)
+def template_dir(nyear, galaxyName, emin, emax):
+    """Return NUXGAL_TEMPLATE_DIR for a given sample and energy bin range"""
+    return NUXGAL_TEMPLATE_DIR.format(nyear=nyear, galaxyName=galaxyName, emin=emin, emax=emax)
+
+
+@functools.lru_cache(maxsize=4096)
+def beam_fname(year, ebin):
+    """Return BEAM_FNAME_FORMAT for a given sample and energy bin"""
+    return BEAM_FNAME_FORMAT.format(year=year, ebin=ebin)
+
+
 # Other things
 randomseed_galaxy = 42                                             # Seed used to produce random galaxy sample
 THREE_YEAR_NAMES = ['IC79-2010', 'IC86-2011', 'IC86-2012']         # Keys for 3 year data sample
@@ -83,38 +120,128 @@ STANDARD_SPECTRAL_INDICES = [3.7, 2.28, 2.89]                      # Indices to
 
 
 # Derived quantities for analyzing the Neutrino sample and cross-correlation
+# The array valued ones are only computed when first accessed, see __getattr__ below
 
 # Energy binning
 NEbin = NEEdges-1                                                  # Number of Energy bins
 map_logE_edge = np.linspace(LOG_EMIN, LOG_EMAX, NEEdges)           # log10(E/GeV) of energy bin edges
 map_logE_center = (map_logE_edge[0:-1] + map_logE_edge[1:]) / 2.   # Energy bin centers in log10(E/GeV)
 map_dlogE = np.mean(map_logE_edge[1:] - map_logE_edge[0:-1])       # Width of energy bins in log10(E/GeV)
-map_E_edge = np.power(10, map_logE_edge)                           # Energy bin edges in GeV
-map_E_center = np.power(10, map_logE_center)                       # Energy bin geometric centers
-map_E_center_sq = map_E_center * map_E_center                      # Square of energy bin centers
 #dlogE_micro=0.25                                               # log10(Energy) microbin size
 dlogE_micro = 1.
-logE_microbin_edge = np.arange(LOG_EMIN, LOG_EMAX + dlogE_micro, dlogE_micro)   # log10(Energy) microbin edges
 
 # Sin dec bins
 dsindec = 0.05                                                     # Sin declination bin size
 #dsindec = 0.1
-sindec_bin_edge = np.arange(-1, 1. + dsindec, dsindec)             # Sin declination bin edges
 
 # Spatial binning and spherical harmonic parameters
 NPIXEL = hp.pixelfunc.nside2npix(NSIDE)    # Number of pixels
 NCL = 3*NSIDE                              # Number of c_l to use in analysis
 NALM = int((NCL) * (NCL+1) / 2)            # Number of a_lm to use in analysis
 MAX_L = NCL - 1                            # Largest L to use in analysis
-ell = np.arange(NCL)                       # Array of all l values, useful in plotting
 
 # southern sky mask
-exposuremap_theta, exposuremap_phi = hp.pixelfunc.pix2ang(NSIDE, np.arange(NPIXEL))
 theta_north = np.radians(95.)
 #theta_north = np.radians(180.)
-idx_muon = np.where(exposuremap_theta > theta_north)
 
-GAMMAS = np.arange(1.5, 4.1, .5)
 #ANALYSIS_VERSION = 'version-003-p03'
 ANALYSIS_VERSION = 'version-004-p02'
 #ANALYSIS_VERSION = 'version-001-p02'
+
+
+# Lazily computed quantities, each helper returns all the names it defines
+def _compute_energy_bins():
+    map_E_center = 10. ** map_logE_center
+    return dict(map_E_edge=10. ** map_logE_edge,                         # Energy bin edges in GeV
+                map_E_center=map_E_center,                               # Energy bin geometric centers
+                map_E_center_sq=map_E_center * map_E_center)             # Square of energy bin centers
+
+
+def _compute_microbins():
+    return dict(logE_microbin_edge=np.arange(LOG_EMIN, LOG_EMAX + dlogE_micro, dlogE_micro),   # log10(Energy) microbin edges
+                sindec_bin_edge=np.arange(-1, 1. + dsindec, dsindec))                          # Sin declination bin edges
+
+
+def _compute_ell():
+    return dict(ell=np.arange(NCL))            # Array of all l values, useful in plotting
+
+
+def _ring_theta():
+    """Colatitude and number of pixels of each of the 4 NSIDE - 1 HEALPix rings
+
+    In RING ordering the pixels are sorted by ring, from north to south, and
+    all pixels of a ring share the same colatitude (Gorski et al. 2005)
+    """
+    ring = np.arange(1, 4 * NSIDE)
+    ring_pole = np.minimum(ring, 4 * NSIDE - ring)                       # Ring index counted from the nearest pole
+    # polar caps, 1 - cos(theta) = ring^2 / (3 NSIDE^2), written to stay accurate near the poles
+    theta_cap = 2 * np.arcsin(ring_pole / (np.sqrt(6) * NSIDE))
+    # equatorial belt, cos(theta) = 4/3 - 2 ring / (3 NSIDE)
+    theta_belt = np.arccos(np.clip(4. / 3 - 2. * ring / (3 * NSIDE), -1, 1))
+    theta_ring = np.where(ring < NSIDE, theta_cap, np.where(ring > 3 * NSIDE, np.pi - theta_cap, theta_belt))
+    npix_ring = 4 * np.minimum(ring_pole, NSIDE)
+    return theta_ring, npix_ring
+
+
+def _compute_exposuremap_theta():
+    theta_ring, npix_ring = _ring_theta()
+    return dict(exposuremap_theta=np.repeat(theta_ring, npix_ring))      # Colatitude of each pixel
+
+
+def _compute_exposuremap_phi():
+    ipix = np.arange(NPIXEL, dtype=np.int64)
+    return dict(exposuremap_phi=hp.pixelfunc.pix2ang(NSIDE, ipix)[1])    # Longitude of each pixel
+
+
+def _muon_start_pixel():
+    # the colatitude increases with the ring index, so the southern sky
+    # mask is every pixel from the first ring below theta_north onwards
+    theta_ring, npix_ring = _ring_theta()
+    return int(npix_ring[theta_ring <= theta_north].sum())
+
+
+def _compute_idx_muon_mask():
+    idx_muon_mask = np.zeros(NPIXEL, dtype=bool)
+    idx_muon_mask[_muon_start_pixel():] = True
+    return dict(idx_muon_mask=idx_muon_mask)                             # Boolean mask of the southern sky
+
+
+def _compute_idx_muon():
+    # same tuple form as np.where, so that it can index maps directly
+    return dict(idx_muon=(np.arange(_muon_start_pixel(), NPIXEL, dtype=np.int64),))   # Pixel indices of the southern sky mask
+
+
+def _compute_gammas():
+    return dict(GAMMAS=np.arange(1.5, 4.1, .5))
+
+
+_LAZY = {
+    'map_E_edge': _compute_energy_bins,
+    'map_E_center': _compute_energy_bins,
+    'map_E_center_sq': _compute_energy_bins,
+    'logE_microbin_edge': _compute_microbins,
+    'sindec_bin_edge': _compute_microbins,
+    'ell': _compute_ell,
+    'exposuremap_theta': _compute_exposuremap_theta,
+    'exposuremap_phi': _compute_exposuremap_phi,
+    'idx_muon_mask': _compute_idx_muon_mask,
+    'idx_muon': _compute_idx_muon,
+    'GAMMAS': _compute_gammas,
+}
+
+
+def __getattr__(name):
+    """Compute and store the quantities in _LAZY the first time they are accessed (PEP 562)"""
+    module_dict = globals()
+    if name in module_dict:
+        return module_dict[name]
+    try:
+        compute = _LAZY[name]
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name)) from None
+    module_dict.update(compute())
+    return module_dict[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
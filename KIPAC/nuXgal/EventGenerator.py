@@ -158,15 +158,17 @@ class EventGenerator():
 
         assert (self.astroModel == 'observed_numu_fraction'), "EventGenerator: incorrect astrophysical model"
         density_nu = density_nu.copy()
-        density_nu[Defaults.idx_muon] = 0. # since we do not know the fraction of numu in southern sky
-        density_nu = density_nu / density_nu.sum()
+        density_nu[Defaults.idx_muon_mask] = 0. # since we do not know the fraction of numu in southern sky
+        density_nu /= density_nu.sum()
 
         N_astro_north_obs = np.random.poisson(self.nevts * N_yr * self.f_astro_north_truth)
-        N_astro_north_exp = [N_astro_north_obs[i] / np.sum(self._astro_gen.prob_reject()[i] * density_nu) for i in range(Defaults.NEbin)]
-        astro_map = self.astroEvent_galaxy(np.array(N_astro_north_exp), density_nu)
+        N_astro_north_exp = N_astro_north_obs / np.sum(self._astro_gen.prob_reject() * density_nu, axis=1)
+        astro_map = self.astroEvent_galaxy(N_astro_north_exp, density_nu)
 
         Natm = np.random.poisson(self.nevts * N_yr * (1-self.f_astro_north_truth))
         self._atm_gen.nevents_expected.set_value(Natm, clear_parent=False)
         atm_map = self._atm_gen.generate_event_maps(1)[0]
 
-        return (atm_map + astro_map)
+        # both maps are freshly generated counts, so they can be summed in place
+        atm_map += astro_map
+        return atm_map
@@ -16,6 +16,8 @@ except ImportError:
 import matplotlib.pyplot as plt
 
 from . import Defaults
+from . import file_utils
+from . import hp_utils
 
 
 class GalaxySample():
@@ -44,7 +46,7 @@ class GalaxySample():
         self.galaxymap[self.idx_galaxymask] = hp.UNSEEN
         self.galaxymap = hp.ma(self.galaxymap)
         self.overdensity = self.galaxymap / self.galaxymap.mean() - 1.
-        self.overdensityalm = hp.map2alm(self.overdensity, lmax=Defaults.MAX_L) / self.f_sky
+        self.overdensityalm = hp_utils.map2alm(self.overdensity, lmax=Defaults.MAX_L) / self.f_sky
         self.density = self.galaxymap / np.sum(self.galaxymap)
 
 
@@ -64,7 +66,8 @@ class GalaxySample():
     def getAutoCorrelation(self):
         """Return the auto correlation of the galaxy sample"""
 
-        w_auto = hp.anafast(self.overdensity, lmax=Defaults.MAX_L) / self.f_sky
+        # overdensityalm already carries a factor 1 / f_sky
+        w_auto = hp.alm2cl(self.overdensityalm) * self.f_sky
         return w_auto
 
     def getAutoCorrelationPolSpice(self):
@@ -572,7 +575,7 @@ class GalaxySample_Analy(GalaxySample):
     def __init__(self):
         """C'tor"""
         GalaxySample.__init__(self, "analy", self.mask())
-        self.analyCL = np.loadtxt(Defaults.ANALYTIC_CL_PATH)
+        self.analyCL = file_utils.load_txt(Defaults.ANALYTIC_CL_PATH)
 
 
 class GalaxySample_Flat(GalaxySample):
@@ -602,7 +605,7 @@ class GalaxySample_Flat(GalaxySample):
         self.galaxymap[self.idx_galaxymask] = hp.UNSEEN
         self.galaxymap = hp.ma(self.galaxymap)
         self.overdensity = self.galaxymap / self.galaxymap.mean() - 1.
-        self.overdensityalm = hp.map2alm(self.overdensity, lmax=Defaults.MAX_L) / self.f_sky
+        self.overdensityalm = hp_utils.map2alm(self.overdensity, lmax=Defaults.MAX_L) / self.f_sky
         self.density = self.galaxymap / np.sum(self.galaxymap)
 
     @staticmethod
@@ -680,7 +683,7 @@ class GalaxySampleLibrary:
         write_map: `bool`
             if True write the generate map to the ancilary data area
         """
-        analyCL = np.loadtxt(Defaults.ANALYTIC_CL_PATH)
+        analyCL = file_utils.load_txt(Defaults.ANALYTIC_CL_PATH)
         np.random.seed(self.randomseed_galaxy)
         alm = hp.sphtfunc.synalm(analyCL, lmax=Defaults.MAX_L)
         density_g = hp.sphtfunc.alm2map(alm, Defaults.NSIDE)
@@ -3,8 +3,6 @@
 import os
 import numpy as np
 import healpy as hp
-import emcee
-import corner
 import csky as cy
 import json
 import itertools
@@ -13,15 +11,13 @@ from multiprocessing import Pool
 
 
 from tqdm import tqdm
-import matplotlib.pyplot as plt
-import matplotlib
-from pandas import concat
 
 from scipy.optimize import minimize
+from scipy.linalg import eigh
 from scipy.stats import norm, distributions, multivariate_normal
-from scipy.interpolate import interp1d
 
 from . import Defaults
+from . import file_utils
 from .NeutrinoSample import NeutrinoSample
 from .FermipyCastro import LnLFn
 from .GalaxySample import GALAXY_LIBRARY
@@ -31,6 +27,102 @@ from .Models import TemplateModel, MCBackgroundModel
 from .DataSpec import data_spec_factory
 
 
+def _log_likelihood_diag(f, w_resid0, w_diff, w_half_inv_var):
+    """Unnormalized log of the diagonal Gaussian likelihood,
+    summed over energy bins (rows) and multipoles (columns)
+
+    data - model(f) is written as w_resid0 - f * w_diff, with
+    w_resid0 = data - atm and w_diff = model_f1 - atm
+    """
+    resid = w_resid0 - f[:, np.newaxis] * w_diff
+    return -np.sum(resid * resid * w_half_inv_var, dtype=np.float64)
+
+
+def _log_likelihood_diag_batch(f, w_resid0, w_diff, w_half_inv_var):
+    """`_log_likelihood_diag` for each row of the (N, Ebin) array f"""
+    resid = w_resid0 - f[:, :, np.newaxis] * w_diff
+    return -np.sum(resid * resid * w_half_inv_var, axis=(1, 2), dtype=np.float64)
+
+
+try:
+    from numba import njit, prange
+except ImportError:
+    pass
+else:
+    @njit(cache=True, fastmath=True)
+    def _log_likelihood_diag(f, w_resid0, w_diff, w_half_inv_var):
+        """Unnormalized log of the diagonal Gaussian likelihood,
+        summed over energy bins (rows) and multipoles (columns)
+
+        data - model(f) is written as w_resid0 - f * w_diff, with
+        w_resid0 = data - atm and w_diff = model_f1 - atm
+        """
+        lnL = 0.
+        for i in range(w_resid0.shape[0]):
+            for l in range(w_resid0.shape[1]):
+                resid = w_resid0[i, l] - f[i] * w_diff[i, l]
+                lnL -= resid * resid * w_half_inv_var[i, l]
+        return lnL
+
+    # only a few energy bins are fitted, so the threads split a batch of f instead
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _log_likelihood_diag_batch(f, w_resid0, w_diff, w_half_inv_var):
+        """`_log_likelihood_diag` for each row of the (N, Ebin) array f"""
+        lnL = np.empty(f.shape[0])
+        for j in prange(f.shape[0]):
+            lnL[j] = _log_likelihood_diag(f[j], w_resid0, w_diff, w_half_inv_var)
+        return lnL
+
+
+def _mcmc_log_probability(f, cached):
+    """Log probability sampled by `Likelihood.runMCMC`
+
+    This mirrors `Likelihood.log_probability` but only needs the cached
+    arrays, so that it is cheap to send to the worker processes of a pool
+
+    Parameters
+    ----------
+    f : `np.ndarray`
+        The signal fraction in each fitted energy bin
+    cached : `tuple`
+        (lnL_norm_sum, w_resid0, w_diff, w_half_inv_var) as cached by `Likelihood.inputData`
+
+    Returns
+    -------
+    value : `float`
+        The log of the probability, defined as log_prior + log_likelihood
+    """
+    if np.min(f) <= -4. or np.max(f) >= 4.:
+        return -np.inf
+    lnL_norm_sum, w_resid0, w_diff, w_half_inv_var = cached
+    return lnL_norm_sum + _log_likelihood_diag(np.asarray(f, dtype=float), w_resid0, w_diff, w_half_inv_var)
+
+
+def _mcmc_log_probability_batch(f, cached):
+    """`_mcmc_log_probability` for the (Nwalker, ndim) positions of the whole ensemble
+
+    Parameters
+    ----------
+    f : `np.ndarray`
+        The signal fraction in each fitted energy bin, one row per walker
+    cached : `tuple`
+        (lnL_norm_sum, w_resid0, w_diff, w_half_inv_var) as cached by `Likelihood.inputData`
+
+    Returns
+    -------
+    value : `np.ndarray`
+        The log of the probability of each walker
+    """
+    f = np.ascontiguousarray(f, dtype=float)
+    lnL_norm_sum, w_resid0, w_diff, w_half_inv_var = cached
+    # only the walkers inside the prior are evaluated
+    inside = (f.min(axis=1) > -4.) & (f.max(axis=1) < 4.)
+    value = np.full(f.shape[0], -np.inf)
+    if inside.any():
+        value[inside] = lnL_norm_sum + _log_likelihood_diag_batch(f[inside], w_resid0, w_diff, w_half_inv_var)
+    return value
+
+
 def significance(chi_square, dof):
     """Construct an significance for a chi**2 distribution
 
@@ -76,8 +168,10 @@ class Likelihood():
     AstroSTDFname = Defaults.SYNTHETIC_ASTRO_W_STD_FORMAT
     WCovFname = Defaults.SYNTHETIC_W_COV_FORMAT
     neutrino_sample_class = NeutrinoSample
+    # acceptance interpolators shared between instances, see _build_acc_interps
+    _acc_interp_cache = {}
 
-    def __init__(self, N_yr, galaxyName, Ebinmin, Ebinmax, lmin, gamma=2.5, recompute_model=False, mc_background=False, fit_bounds=[0, 1], path_sig=''):
+    def __init__(self, N_yr, galaxyName, Ebinmin, Ebinmax, lmin, gamma=2.5, recompute_model=False, mc_background=False, fit_bounds=[0, 1], path_sig='', event_generator=None, galaxy_sample=None):
         """
         Initialize the Likelihood object.
 
@@ -101,16 +195,25 @@ class Likelihood():
             If True, use Monte Carlo background model. Default is False.
         fit_bounds : list, optional
             List of fit bounds for each energy bin. Default is [0, 1].
+        event_generator : CskyEventGenerator, optional
+            Event generator to share with other likelihoods built for the same
+            sample, energy bins, mask and injection. By default one is built on first use.
+        galaxy_sample : GalaxySample, optional
+            Already loaded sample for galaxyName, to share it between likelihoods.
+            By default it is loaded from GALAXY_LIBRARY.
         """
         self.N_yr = N_yr
-        self.gs = GALAXY_LIBRARY.get_sample(galaxyName)
+        if galaxy_sample is None:
+            galaxy_sample = GALAXY_LIBRARY.get_sample(galaxyName)
+        self.gs = galaxy_sample
         self.anafastMask()
         self.Ebinmin = Ebinmin
         self.Ebinmax = Ebinmax
         self.lmin = lmin
-        self._event_generator = None
+        self._event_generator = event_generator
         self._per_ebin_event_generators = None
         self.w_data = None
+        self.w_std = None
         self.Ncount = None
         self.gamma = gamma
         self.mc_background = mc_background
@@ -131,7 +234,7 @@ class Likelihood():
 
         self.w_atm_mean = self.background_model.w_mean
         self.w_atm_std = self.background_model.w_std
-        self.w_atm_std_square = self.w_atm_std ** 2
+        self.w_atm_std_square = np.square(self.w_atm_std)
 
         self.signal_model = TemplateModel(
             self.gs,
@@ -147,11 +250,69 @@ class Likelihood():
 
         self.cov_fname = self.WCovFname.format(nyear=self.N_yr, galaxyName=galaxyName)
         if os.path.exists(self.cov_fname):
-            self.w_cov = np.load(self.cov_fname)
+            self.w_cov = file_utils.load_npy(self.cov_fname)
         else:
             self.w_cov = np.zeros((Defaults.NEbin, Defaults.NCL, Defaults.NCL))
 
 
+    @property
+    def w_data(self):
+        """The measured (Ebin, l) cross correlation"""
+        return self._w_data
+
+    @w_data.setter
+    def w_data(self, value):
+        self._w_data = value
+        self._lnL_cache_stale = True
+        self._cov_cache_stale = True
+
+    @property
+    def w_std(self):
+        """The (Ebin, l) standard deviation of w_data"""
+        return self._w_std
+
+    @w_std.setter
+    def w_std(self, value):
+        self._w_std = value
+        self._lnL_cache_stale = True
+
+    @property
+    def w_cov(self):
+        """The (Ebin, l, l) covariance of w_data"""
+        return self._w_cov
+
+    @w_cov.setter
+    def w_cov(self, value):
+        self._w_cov = value
+        self._cov_cache_stale = True
+
+    def _check_likelihood_cache(self):
+        """Build the likelihood cache on first use after w_data or w_std were assigned
+
+        Filling a newly assigned array row by row is fine, as the cache is only built
+        when the likelihood is next evaluated. The arrays are then made read-only,
+        so that editing them in place afterwards raises instead of leaving the cache
+        stale: assign a new array instead.
+        """
+        if self._lnL_cache_stale:
+            self._build_likelihood_cache()
+            for arr in (self._w_data, self._w_std):
+                if isinstance(arr, np.ndarray):
+                    arr.setflags(write=False)
+            self._lnL_cache_stale = False
+
+    def _check_cov_cache(self):
+        """Build the covariance likelihood cache on first use after w_data or w_cov were assigned
+
+        As in `_check_likelihood_cache` the arrays are then made read-only
+        """
+        if self._cov_cache_stale:
+            self._build_cov_cache()
+            for arr in (self._w_data, self._w_cov):
+                if isinstance(arr, np.ndarray):
+                    arr.setflags(write=False)
+            self._cov_cache_stale = False
+
     @property
     def event_generator(self):
         if self._event_generator is None:
@@ -218,21 +379,22 @@ class Likelihood():
 
         llh.w_data = np.zeros((Defaults.NEbin, Defaults.NCL))
         llh.w_std = np.zeros((Defaults.NEbin, Defaults.NCL))
-        llh.w_cov = np.zeros((Defaults.NEbin, Defaults.NCL, Defaults.NCL))
+        if 'cov' in kwargs:
+            llh.w_cov = np.zeros((Defaults.NEbin, Defaults.NCL, Defaults.NCL))
+        else:
+            cov_fname = llh.WCovFname.format(nyear=kwargs['N_yr'], galaxyName=kwargs['galaxy_catalog'])
+            if os.path.exists(cov_fname):
+                llh.w_cov = file_utils.load_npy(cov_fname)
+            else:
+                llh.w_cov = np.ones((Defaults.NEbin, Defaults.NCL, Defaults.NCL))
         for i, ebin in enumerate(range(llh.Ebinmin, llh.Ebinmax)):
             if isinstance(list(kwargs['cls'].keys())[i], str):
                 ebin = str(ebin)
             llh.w_data[int(ebin)] = kwargs['cls'][ebin]
-            if 'std' in kwargs:
+            if 'cls_std' in kwargs:
                 llh.w_std[int(ebin)] = kwargs['cls_std'][ebin]
             if 'cov' in kwargs:
                 llh.w_cov[int(ebin)] = kwargs['cov'][ebin]
-            else:
-                cov_fname = llh.WCovFname.format(nyear=kwargs['N_yr'], galaxyName=kwargs['galaxy_catalog'])
-                if os.path.exists(cov_fname):
-                    llh.w_cov = np.load(cov_fname)
-                else:
-                    llh.w_cov = np.ones((Defaults.NEbin, Defaults.NCL, Defaults.NCL))
 
         if 'countsmap' in kwargs:
             ns = NeutrinoSample()
@@ -252,31 +414,38 @@ class Likelihood():
         """Generate a mask that merges the neutrino selection mask
         with the galaxy sample mask
         """
-        # mask Southern sky to avoid muons
-        mask_nu = np.zeros(Defaults.NPIXEL, dtype=bool)
-        mask_nu[Defaults.idx_muon] = 1.
-        # add the mask of galaxy sample
-        mask_nu[self.gs.idx_galaxymask] = 1.
-        self.idx_mask = np.where(mask_nu != 0)
-        self.f_sky = 1. - len(self.idx_mask[0]) / float(Defaults.NPIXEL)
+        # mask Southern sky to avoid muons, and add the mask of galaxy sample.
+        # union1d is sorted and unique, the same pixels np.where would give
+        idx = np.union1d(Defaults.idx_muon[0], self.gs.idx_galaxymask[0])
+        self.idx_mask = (idx,)
+        self.f_sky = 1. - idx.size / float(Defaults.NPIXEL)
 
     def bootstrapSigma(self, ebin, niter=100, mp_cpus=1):
-        cl = np.zeros((niter, Defaults.NCL))
-        evt = self.neutrino_sample.event_list
+        evt = list(itertools.chain.from_iterable(self.neutrino_sample.event_list))
         elo, ehi = Defaults.map_logE_edge[ebin], Defaults.map_logE_edge[ebin + 1]
-        flatevt = cy.utils.Events(concat([i.as_dataframe for i in itertools.chain.from_iterable(evt)]))
-        flatevt = flatevt[(flatevt['log10energy'] >= elo) * (flatevt['log10energy'] < ehi)]
-        galaxy_sample = self.gs
-        idx_mask = self.idx_mask
-
+        # only the columns used below are flattened, there is no need to build a DataFrame
+        loge = np.concatenate([tr['log10energy'] for tr in evt])
+        # same energy selection as NeutrinoSample.countsMap
+        idx = (loge > elo) * (loge < ehi)
+        ra = np.concatenate([tr['ra'] for tr in evt])[idx]
+        dec = np.concatenate([tr['dec'] for tr in evt])[idx]
+
+        # the event pixels only need to be computed once,
+        # each bootstrap iteration resamples them with replacement
+        pixels = hp.ang2pix(Defaults.NSIDE, np.degrees(ra), np.degrees(dec), lonlat=True)
+        worker_args = (pixels, self.gs, self.idx_mask, ebin, self.acceptance)
+
+        # seeded from the global state, so np.random.seed still makes this reproducible
+        seeds = np.random.randint(2**31, size=niter)
         if mp_cpus > 1:
-            p = Pool(mp_cpus)
-            iterables = ((flatevt, galaxy_sample, idx_mask, ebin, self.acceptance) for i in range(niter))
-            cl = p.starmap(bootstrap_worker, iterables)
+            # the inputs are sent once per worker, each task only carries its seed
+            with Pool(mp_cpus, initializer=_bootstrap_init, initargs=worker_args) as p:
+                cl = list(p.imap_unordered(_bootstrap_task, seeds, chunksize=max(1, niter // mp_cpus)))
         else:
+            rng = np.random.default_rng(seeds[0] if niter else None)
             cl = np.zeros((niter, Defaults.NCL))
             for i in tqdm(range(niter)):
-                cl[i] = bootstrap_worker(flatevt, galaxy_sample, idx_mask, ebin, self.acceptance)
+                cl[i] = bootstrap_worker(*worker_args, rng=rng)
         cl = np.array(cl)
 
         return np.std(cl, axis=0), np.cov(cl.T)
@@ -299,71 +468,158 @@ class Likelihood():
         self.w_data = ns.getCrossCorrelation(self.gs, acceptance=self.acceptance)
         self.Ncount = ns.getEventCounts()
 
-        self.w_std = np.copy(self.w_atm_std)
-        self.w_std_square = np.copy(self.w_atm_std_square)
         self.w_cov = np.zeros((Defaults.NEbin, Defaults.NCL, Defaults.NCL))
 
-        for ebin in range(self.Ebinmin, self.Ebinmax):
-            if bootstrap_niter > 0:
+        if bootstrap_niter > 0:
+            self.w_std = np.copy(self.w_atm_std)
+            for ebin in range(self.Ebinmin, self.Ebinmax):
                 self.w_std[ebin], self.w_cov[ebin] = self.bootstrapSigma(ebin, niter=bootstrap_niter, mp_cpus=mp_cpus)
-            self.w_std_square[ebin] = self.w_std[ebin]**2
+            self.w_std_square = np.square(self.w_std)
+        else:
+            # the background model spread is used as is, it is only
+            # read from here on so the arrays from __init__ are shared
+            self.w_std = self.w_atm_std
+            self.w_std_square = self.w_atm_std_square
+
+    def _build_likelihood_cache(self):
+        """Cache the parts of the diagonal Gaussian likelihood
+        that do not depend on the signal fraction f
+
+        Only the fitted energy bins, Ebinmin to Ebinmax, are cached.
+        This is called by `_check_likelihood_cache` when the cache is stale
+        """
+        ebins = slice(self.Ebinmin, self.Ebinmax)
+        w_var = np.square(self.w_std[ebins, self.lmin:])
+        if not np.all(w_var > 0):
+            raise ValueError("The diagonal likelihood needs w_std > 0 in the fitted energy bins, "
+                             "run inputData or set w_std first")
+        # normalization of the Gaussian, -0.5 * sum_l log(2 pi var_l)
+        self._lnL_norm = -0.5 * (np.log(w_var).sum(axis=1) + w_var.shape[1] * np.log(2 * np.pi))
+        self._lnL_norm_sum = self._lnL_norm.sum()
+
+        # the model is affine in f, data - model(f) = (data - atm) - f * (model_f1 - atm),
+        # so the (Ebin, l >= lmin) differences and 0.5 / var are all the likelihood needs.
+        # They are single precision on the hot path, to halve the memory traffic, but the
+        # differences are taken in double precision and all sums are accumulated in double
+        w_atm = self.w_atm_mean[ebins, self.lmin:]
+        self._w_resid0_cut = np.ascontiguousarray(self.w_data[ebins, self.lmin:] - w_atm, dtype=np.float32)
+        self._w_diff_cut = np.ascontiguousarray(self.w_model_f1[ebins, self.lmin:] - w_atm, dtype=np.float32)
+        self._w_half_inv_var_cut = np.ascontiguousarray(0.5 / w_var, dtype=np.float32)
+
+        # summed over l the chi^2 / 2 is then a parabola in f, a - 2 b f + c f^2, keep
+        # its (Ebin, 3) coefficients so scans over f in a single bin do not touch the l axis
+        w_weighted_diff = self._w_diff_cut.astype(np.float64) * self._w_half_inv_var_cut
+        self._lnL_quad = np.stack([np.sum(np.square(self._w_resid0_cut, dtype=np.float64) * self._w_half_inv_var_cut, axis=1),
+                                   np.sum(w_weighted_diff * self._w_resid0_cut, axis=1),
+                                   np.sum(w_weighted_diff * self._w_diff_cut, axis=1)], axis=1)
+
+    def _fitted_row(self, energyBin):
+        """Row of energyBin in the likelihood caches, which only hold the fitted energy bins"""
+        if not self.Ebinmin <= energyBin < self.Ebinmax:
+            raise ValueError("Energy bin %s is not fitted, the fitted bins are %s to %s" %
+                             (energyBin, self.Ebinmin, self.Ebinmax - 1))
+        return energyBin - self.Ebinmin
+
+    def _build_cov_cache(self):
+        """Cache a factorization of the covariance in each fitted energy bin
+
+        The bootstrap covariance is typically rank deficient, so we keep
+        a factor U with U U^T = pinv(cov) along with the log
+        pseudo-determinant, dropping the eigenvalues below the same
+        cutoff that multivariate_normal(allow_singular=True) uses.
+        A covariance with eigenvalues below minus that cutoff is not
+        positive semidefinite and raises a ValueError.
+
+        The residual data - model(f) = (data - atm) - f * (model_f1 - atm)
+        is projected once on U and on the basis N of the dropped
+        directions.  A residual whose N part is larger than the spread
+        allowed along those directions is outside the support of the
+        distribution and has a log likelihood of -inf
+        """
+        self._cov_U = []
+        self._cov_lnL_norm = []
+        self._cov_z_resid0 = []
+        self._cov_z_diff = []
+        self._cov_n_resid0 = []
+        self._cov_n_diff = []
+        self._cov_n_atol = []
+        for ebin in range(self.Ebinmin, self.Ebinmax):
+            s, u = eigh(self.w_cov[ebin, self.lmin:, self.lmin:])
+            eps = 1e6 * np.finfo(float).eps * np.max(np.abs(s))
+            if not eps > 0:
+                raise ValueError("The covariance likelihood needs a non-zero w_cov in energy bin %i" % ebin)
+            if np.min(s) < -eps:
+                raise ValueError("The covariance in energy bin %i is not positive semidefinite" % ebin)
+            keep = s > eps
+            cov_U = u[:, keep] / np.sqrt(s[keep])
+            cov_N = u[:, ~keep]
+            self._cov_U.append(cov_U)
+            self._cov_lnL_norm.append(-0.5 * (np.sum(keep) * np.log(2 * np.pi) + np.log(s[keep]).sum()))
+
+            w_resid0 = self.w_data[ebin, self.lmin:] - self.w_atm_mean[ebin, self.lmin:]
+            w_diff = self.w_model_f1[ebin, self.lmin:] - self.w_atm_mean[ebin, self.lmin:]
+            self._cov_z_resid0.append(np.dot(w_resid0, cov_U))
+            self._cov_z_diff.append(np.dot(w_diff, cov_U))
+            self._cov_n_resid0.append(np.dot(w_resid0, cov_N))
+            self._cov_n_diff.append(np.dot(w_diff, cov_N))
+            self._cov_n_atol.append(np.sqrt(eps))
+
+    def _log_likelihood_cov_row(self, f, i):
+        """The covariance log likelihood of the i-th fitted energy bin, see `_build_cov_cache`"""
+        n = self._cov_n_resid0[i] - f * self._cov_n_diff[i]
+        if np.dot(n, n) > self._cov_n_atol[i] ** 2:
+            return -np.inf
+        z = self._cov_z_resid0[i] - f * self._cov_z_diff[i]
+        return self._cov_lnL_norm[i] - 0.5 * np.dot(z, z)
 
     def log_likelihood_Ebin(self, f, energyBin):
         """Compute the log of the likelihood for a particular model in given energy bin
 
         Parameters
         ----------
-        f : `float`
-            The fraction of neutrino events correlated with the Galaxy sample
+        f : `float` or `np.ndarray`
+            The fraction of neutrino events correlated with the Galaxy sample,
+            an array of values is evaluated all at once
         energyBin: `index`
-            The energy bin where likelihood is computed
+            The energy bin where likelihood is computed, one of the fitted bins
         Returns
         -------
-        logL : `float`
+        logL : `float` or `np.ndarray`
             The log likelihood, computed as sum_l (data_l - f * model_mean_l) /  model_std_l
         """
 
-        f = np.array(f)
+        f = np.asarray(f, dtype=np.float64)
 
-        w_data = self.w_data[energyBin, self.lmin:]
-
-        w_model_mean = (self.w_model_f1[energyBin, self.lmin:] * f)
-        w_model_mean += (self.w_atm_mean[energyBin, self.lmin:] * (1 - f))
-
-        w_std = self.w_std[energyBin, self.lmin:]
-
-        lnL_le = norm.logpdf(
-            w_data, loc=w_model_mean, scale=w_std)
-        return np.sum(lnL_le)
+        self._check_likelihood_cache()
+        row = self._fitted_row(energyBin)
+        a, b, c = self._lnL_quad[row]
+        return self._lnL_norm[row] - (a - f * (2. * b - c * f))
 
     def log_likelihood(self, f):
         """Compute the log of the likelihood for a particular model
 
         Parameters
         ----------
-        f : `float`
+        f : `np.ndarray`
             The fraction of neutrino events correlated with the Galaxy sample
+            in each fitted energy bin, or an (N, Ebin) array of N such sets
 
         Returns
         -------
-        logL : `float`
+        logL : `float` or `np.ndarray`
             The log likelihood, computed as sum_l (data_l - f * model_mean_l) /  model_std_l
         """
 
-        f = np.array(f)
-
-        lnL_le = 0
-        for i, ebin in enumerate(range(self.Ebinmin, self.Ebinmax)):
-            w_data = self.w_data[ebin, self.lmin:]
+        self._check_likelihood_cache()
+        # any trailing parameters, e.g. the spectral index
+        # in minimize__lnL_free_index, are ignored
+        f = np.asarray(f, dtype=float)[..., :self._w_resid0_cut.shape[0]]
+        if f.ndim > 1:
+            return self._lnL_norm_sum + _log_likelihood_diag_batch(
+                np.ascontiguousarray(f), self._w_resid0_cut, self._w_diff_cut, self._w_half_inv_var_cut)
 
-            w_model_mean = (self.w_model_f1[ebin, self.lmin:] * f[i])
-            w_model_mean += (self.w_atm_mean[ebin, self.lmin:] * (1 - f[i]))
-
-            w_std = self.w_std[ebin, self.lmin:]
-
-            lnL_le += norm.logpdf(
-                w_data, loc=w_model_mean, scale=w_std)
-        return np.sum(lnL_le)
+        return self._lnL_norm_sum + _log_likelihood_diag(
+            f, self._w_resid0_cut, self._w_diff_cut, self._w_half_inv_var_cut)
 
     def log_likelihood_free_atm(self, fcorr, fatm):
         lnL_le = 0
@@ -417,20 +673,12 @@ class Likelihood():
             The log likelihood, computed as sum_l (data_l - f * model_mean_l) /  model_std_l
         """
 
-        f = np.array(f)
+        f = np.asarray(f)
 
+        self._check_cov_cache()
         lnL_le = 0
-        for i, ebin in enumerate(range(self.Ebinmin, self.Ebinmax)):
-            w_data = self.w_data[ebin, self.lmin:]
-
-            w_model_mean = (self.w_model_f1[ebin, self.lmin:] * f[i])
-            w_model_mean += (self.w_atm_mean[ebin, self.lmin:] * (1 - f[i]))
-
-            w_cov = self.w_cov[ebin, self.lmin:, self.lmin:]
-
-            #lnL_le += multivariate_normal.logpdf(
-            #    w_data, mean=w_model_mean, cov=w_cov, allow_singular=True)
-            lnL_le += self.multi_norm[i].logpdf(w_data - w_model_mean)
+        for i in range(self.Ebinmax - self.Ebinmin):
+            lnL_le += self._log_likelihood_cov_row(f[i], i)
         return lnL_le
 
 
@@ -441,6 +689,8 @@ class Likelihood():
         ----------
         f : `float`
             The fraction of neutrino events correlated with the Galaxy sample
+        energyBin: `index`
+            The energy bin where likelihood is computed, one of the fitted bins
 
         Returns
         -------
@@ -448,13 +698,8 @@ class Likelihood():
             The log likelihood, computed as sum_l (data_l - f * model_mean_l) /  model_std_l
         """
 
-        w_data = self.w_data[energyBin, self.lmin:]
-
-        w_model_mean = (self.w_model_f1[energyBin, self.lmin:] * f)
-        w_model_mean += (self.w_atm_mean[energyBin, self.lmin:] * (1 - f))
-
-        lnL_le = self.multi_norm[energyBin].logpdf(w_data - w_model_mean)
-        return lnL_le
+        self._check_cov_cache()
+        return self._log_likelihood_cov_row(f, self._fitted_row(energyBin))
 
     def log_likelihood_free_bg_ns_gamma(self, pars):
         fcorr, gamma = pars[:2]
@@ -492,7 +737,7 @@ class Likelihood():
         f : float
             The fraction of the model to use.
         energyBin : int
-            The index of the energy bin.
+            The index of the energy bin, one of the fitted bins.
 
         Returns:
         -------
@@ -500,15 +745,9 @@ class Likelihood():
             The chi-square value.
         """
 
-        w_data = self.w_data[energyBin, self.lmin:]
-
-        w_model_mean = (self.w_model_f1[energyBin, self.lmin:] * f)
-        w_model_mean += (self.w_atm_mean[energyBin, self.lmin:] * (1 - f))
-
-        w_std = self.w_std[energyBin, self.lmin:]
-
-        chisquare = (w_data - w_model_mean) ** 2 / w_std ** 2
-        return np.sum(chisquare)
+        self._check_likelihood_cache()
+        a, b, c = self._lnL_quad[self._fitted_row(energyBin)]
+        return 2 * (a - f * (2. * b - c * f))
     
     def chi_square_cov_Ebin(self, f, energyBin):
         """
@@ -562,26 +801,29 @@ class Likelihood():
             chi_square += self.chi_square_cov_Ebin(f[i], i)
         return chi_square
 
-    def minimize__lnL_analytic(self):
-        len_f = self.Ebinmax - self.Ebinmin
-        f = np.zeros(len_f)
-        for i, ebin in enumerate(range(self.Ebinmin, self.Ebinmax)):
-            cgg = self.w_model_f1[ebin, self.lmin:]
-            cgnu = self.w_data[ebin, self.lmin:]
-            cgatm = self.w_atm_mean[ebin, self.lmin:]
-            cstd = self.w_std[ebin, self.lmin:]
-            f[i] = np.sum((cgg-cgatm)*(cgnu-cgatm)/cstd**2)/np.sum((cgg-cgatm)**2/cstd**2)
-            #sigma_fhat = np.sqrt(1/np.sum(((cgg-cgatm)**2)/2/cstd**2))
+    def _fhat_diag(self):
+        """Unbounded maximum of the diagonal likelihood in each fitted energy bin"""
+        self._check_likelihood_cache()
+        quad = self._lnL_quad
+        return quad[:, 1] / quad[:, 2]
 
-        ts = 2*(self.log_likelihood(f) - self.log_likelihood(np.zeros(len_f)))
-        return f, ts
+    def _ts_diag(self, f):
+        """Test Statistic 2 * (logL_f - logL_0) of the diagonal likelihood in the fitted energy bins"""
+        self._check_likelihood_cache()
+        quad = self._lnL_quad
+        return 2. * np.sum(f * (2. * quad[:, 1] - quad[:, 2] * f))
+
+    def minimize__lnL_analytic(self):
+        f = self._fhat_diag()
+        return f, self._ts_diag(f)
 
     def minimize__lnL(self):
         """Minimize the log-likelihood
-        Parameters
-        ----------
-        f : `float`
-            The fraction of neutrino events correlated with the Galaxy sample
+
+        The model is linear in f and the energy bins are independent, so the
+        log-likelihood is a parabola in each f_i and is maximized analytically.
+        With fit bounds the maximum is the unbounded one clipped to the bounds.
+
         Returns
         -------
         x : `array`
@@ -589,13 +831,15 @@ class Likelihood():
         TS : `float`
             The Test Statistic, computed as 2 * logL_x - logL_0
         """
-        len_f = self.Ebinmax - self.Ebinmin
-        nll = lambda *args: -self.log_likelihood(*args)
-        initial = 0.1 + 0.1 * np.random.randn(len_f)
-        soln = minimize(nll, initial, bounds=self.fit_bounds)
+        f = self._fhat_diag()
 
-        return soln.x, (self.log_likelihood(soln.x) -\
-                            self.log_likelihood(np.zeros(len_f))) * 2
+        # each parabola is maximized independently, so clipping is the exact bounded fit
+        if self.fit_bounds is not None:
+            f_lo = [-np.inf if bound[0] is None else bound[0] for bound in self.fit_bounds]
+            f_hi = [np.inf if bound[1] is None else bound[1] for bound in self.fit_bounds]
+            f = np.clip(f, f_lo, f_hi)
+
+        return f, self._ts_diag(f)
 
     def minimize__lnL_cov(self):
         """Minimize the log-likelihood
@@ -617,7 +861,6 @@ class Likelihood():
         #for i in range(self.Ebinmin, self.Ebinmax):
         #    w_cov[i] += np.eye(w_cov[i].shape[0]) * 1e-9
         #self.multi_norm = [multivariate_normal(cov=w_cov[i], allow_singular=True) for i in range(self.Ebinmin, self.Ebinmax)]
-        self.multi_norm = [multivariate_normal(cov=self.w_cov[i, self.lmin:, self.lmin:], allow_singular=True) for i in range(self.Ebinmin, self.Ebinmax)]
         soln = minimize(nll, initial, bounds=self.fit_bounds)
 
         return soln.x, (self.log_likelihood_cov(soln.x) -\
@@ -806,14 +1049,8 @@ class Likelihood():
         return n * factor
     
     def fi_given_f_gamma(self, f, gamma):
-        acc_total = self.acc_aeff_weighted(gamma)
-        acc_ebin = np.array([self.acc_ebin_aeff_weighted(i, gamma) for i in range(self.Ebinmin, self.Ebinmax)])
-
-        if not hasattr(self, '_acc_total_interp'):
-            self._build_acc_interps()
-        acc_ebin = np.array([self._acc_ebin_interp[i](gamma) for i in range(self.Ebinmin, self.Ebinmax)])
-        acc_total = self._acc_total_interp(gamma)
-        f = f * acc_ebin / acc_total
+        acc_ebin, acc_total = self._acc_given_gamma(gamma)
+        f = f * acc_ebin[self.Ebinmin:self.Ebinmax] / acc_total
         return f
 
         #fi = []
@@ -856,46 +1093,73 @@ class Likelihood():
         
 
     def _build_acc_interps(self):
-        from scipy.interpolate import interp1d
+        """Tabulate the aeff weighted acceptances on a grid of spectral indices"""
+        # these only depend on what the event generators are built from: the sample,
+        # the energy range that cuts the data spec, the signal MC and the mask,
+        # so they are built once per process for each such combination
+        key = (self.N_yr, self.gs.galaxyName, self.mc_background, self.Ebinmin, self.Ebinmax,
+               self.path_sig, self.idx_mask[0].tobytes())
+        if key in Likelihood._acc_interp_cache:
+            self._acc_tables = Likelihood._acc_interp_cache[key]
+            return
+
         gammas = np.arange(1, 4.25, 0.25)
-        self._acc_ebin_interp = []
-        for i in range(Defaults.NEbin):
-            accs = []
-            for g in gammas:
-                accs.append(self.acc_ebin_aeff_weighted(i, g))
-            self._acc_ebin_interp.append(interp1d(gammas, accs, kind='linear'))
+        # look up the event generators and the neutrino template only once
+        event_generators = self.per_ebin_event_generators
+        nu_map = self.event_generator.density_nu
+        anas = self.event_generator.ana
 
-        accs = []
-        for g in gammas:
-            accs.append(self.acc_aeff_weighted(g))
-        self._acc_total_interp = interp1d(gammas, accs)
+        acc_ebin = np.array([[self._aeff_weighted_acc(event_generators[i].ana, g, nu_map) for g in gammas]
+                             for i in range(Defaults.NEbin)])
+        acc_total = np.array([self._aeff_weighted_acc(anas, g, nu_map) for g in gammas])
+        self._acc_tables = (gammas, acc_ebin, acc_total)
+        Likelihood._acc_interp_cache[key] = self._acc_tables
 
-    def acc_ebin_aeff_weighted(self, ebin, gamma):
-        ra, dec = hp.pix2ang(Defaults.NSIDE, np.arange(Defaults.NPIXEL), lonlat=True)
-        evt = cy.utils.Events(sindec=np.sin(np.radians(dec)))
+    def _acc_given_gamma(self, gamma):
+        """Linearly interpolate the tabulated acceptances at spectral index gamma
+
+        Returns
+        -------
+        acc_ebin : `np.ndarray`
+            The aeff weighted acceptance in each energy bin
+        acc_total : `float`
+            The aeff weighted acceptance of the whole sample
+        """
+        if not hasattr(self, '_acc_tables'):
+            self._build_acc_interps()
+        gammas, acc_ebin, acc_total = self._acc_tables
+        if not gammas[0] <= gamma <= gammas[-1]:
+            raise ValueError("gamma = %s is outside of the tabulated range [%s, %s]" % (gamma, gammas[0], gammas[-1]))
+
+        # all the energy bins share the same grid, so they are blended at once
+        j = min(np.searchsorted(gammas, gamma, side='right') - 1, len(gammas) - 2)
+        t = (gamma - gammas[j]) / (gammas[j + 1] - gammas[j])
+        return (1. - t) * acc_ebin[:, j] + t * acc_ebin[:, j + 1], (1. - t) * acc_total[j] + t * acc_total[j + 1]
+
+    def _sky_events(self):
+        """csky Events at the center of each healpix pixel, built once"""
+        if not hasattr(self, '_sky_evt'):
+            ra, dec = hp.pix2ang(Defaults.NSIDE, np.arange(Defaults.NPIXEL), lonlat=True)
+            self._sky_evt = cy.utils.Events(sindec=np.sin(np.radians(dec)))
+        return self._sky_evt
+
+    def _aeff_weighted_acc(self, anas, gamma, nu_map):
+        evt = self._sky_events()
         acc_map = np.zeros(Defaults.NPIXEL)
-        for subana in self.per_ebin_event_generators[ebin].ana:
+        for subana in anas:
             acc_map += subana.acc_param(evt, gamma=gamma)
         acc_map[self.idx_mask] = hp.UNSEEN
         acc_map = hp.ma(acc_map)
 
-        nu_map = self.event_generator.density_nu
         weighted_acc = np.mean(nu_map / acc_map)
         return weighted_acc
-    
-    def acc_aeff_weighted(self, gamma):
-        ra, dec = hp.pix2ang(Defaults.NSIDE, np.arange(Defaults.NPIXEL), lonlat=True)
-        evt = cy.utils.Events(sindec=np.sin(np.radians(dec)))
-        acc_map = np.zeros(Defaults.NPIXEL)
-        for subana in self.event_generator.ana:
-            acc_map += subana.acc_param(evt, gamma=gamma)
 
-        acc_map[self.idx_mask] = hp.UNSEEN
-        acc_map = hp.ma(acc_map)
+    def acc_ebin_aeff_weighted(self, ebin, gamma):
+        return self._aeff_weighted_acc(self.per_ebin_event_generators[ebin].ana, gamma,
+                                       self.event_generator.density_nu)
 
-        nu_map = self.event_generator.density_nu
-        weighted_acc = np.mean(nu_map / acc_map)
-        return weighted_acc
+    def acc_aeff_weighted(self, gamma):
+        return self._aeff_weighted_acc(self.event_generator.ana, gamma, self.event_generator.density_nu)
 
 
 
@@ -954,6 +1218,9 @@ class Likelihood():
         coloralphalimit : `float`
         colorfbin : `int`
         """
+        import matplotlib
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(8, 6))
         font = {'family': 'Arial', 'weight' : 'normal', 'size'   : 21}
         legendfont = {'fontsize' : 21, 'frameon' : False}
@@ -979,22 +1246,21 @@ class Likelihood():
         # common x for castro object initialization
         f_Ebin = np.linspace(0, 4, 1000)
 
+        # exposuremap assuming alpha = 2.28 (numu) to convert bestfit f_astro to flux,
+        # averaged over the unmasked pixels of each fitted energy bin
         exposuremap = ICECUBE_EXPOSURE_LIBRARY.get_exposure('IC86-2012', 2.28)
+        ebins = slice(self.Ebinmin, self.Ebinmax)
+        unmasked = np.ones(Defaults.NPIXEL, dtype=bool)
+        unmasked[self.idx_mask[0]] = False
+        exposure_mean = exposuremap[ebins][:, unmasked].mean(axis=1)
+        denom_const = 1e4 * Defaults.DT_SECONDS * self.N_yr * 4 * np.pi * self.f_sky * Defaults.map_dlogE * np.log(10.)
+        factor_f2flux_Ebin = self.Ncount[ebins] / (exposure_mean * denom_const) * Defaults.map_E_center[ebins]
 
         for idx_E in range(self.Ebinmin, self.Ebinmax):
-            # exposuremap assuming alpha = 2.28 (numu) to convert bestfit f_astro to flux
-            exposuremap_E = exposuremap[idx_E].copy()
-            exposuremap_E[self.idx_mask] = hp.UNSEEN
-            exposuremap_E = hp.ma(exposuremap_E)
-            factor_f2flux = self.Ncount[idx_E] / (exposuremap_E.mean() * 1e4 * Defaults.DT_SECONDS *
-                                                  self.N_yr * 4 * np.pi * self.f_sky * Defaults.map_dlogE *
-                                                  np.log(10.)) * Defaults.map_E_center[idx_E]
-
             idx_bestfit_f = idx_E - self.Ebinmin
+            factor_f2flux = factor_f2flux_Ebin[idx_bestfit_f]
             lnl_max = self.log_likelihood_Ebin(bestfit_f[idx_bestfit_f], idx_E)
-            lnL_Ebin = np.zeros_like(f_Ebin)
-            for idx_f, f in enumerate(f_Ebin):
-                lnL_Ebin[idx_f] = self.log_likelihood_Ebin(f, idx_E)
+            lnL_Ebin = self.log_likelihood_Ebin(f_Ebin, idx_E)
 
             castro = LnLFn(f_Ebin, -lnL_Ebin)
             TS_Ebin = castro.TS()
@@ -1016,12 +1282,9 @@ class Likelihood():
                 f_select_lo, f_select_hi = 0, castro.getLimit(coloralphalimit)
 
 
-            # compute color blocks of delta likelihood
-            dlnl = np.zeros((colorfbin, 1))
+            # compute color blocks of delta likelihood, one row per lower edge of f_select
             f_select = np.linspace(f_select_lo, f_select_hi, colorfbin+1)
-
-            for idx_f_select, _f_select in enumerate(f_select[:-1]):
-                dlnl[idx_f_select][0] = self.log_likelihood_Ebin(_f_select, idx_E) - lnl_max
+            dlnl = (self.log_likelihood_Ebin(f_select[:-1], idx_E) - lnl_max)[:, np.newaxis]
 
             y_select = f_select * factor_f2flux
             m = plt.pcolormesh([Defaults.map_logE_edge[idx_E], Defaults.map_logE_edge[idx_E+1]], y_select, dlnl,
@@ -1067,14 +1330,18 @@ class Likelihood():
             return -np.inf
         return lp + self.log_likelihood(f)
 
-    def runMCMC(self, Nwalker, Nstep):
+    def runMCMC(self, Nwalker, Nstep, mp_cpus=1):
         """Run a Markov Chain Monte Carlo
 
         Parameters
         ----------
         Nwalker : `int`
         Nstep : `int`
+        mp_cpus : `int`
+            Number of processes used to evaluate the walkers,
+            by default the whole ensemble is evaluated at once in this process
         """
+        import emcee
 
         ndim = self.Ebinmax - self.Ebinmin
         pos = 0.3 + np.random.randn(Nwalker, ndim) * 0.1
@@ -1082,8 +1349,18 @@ class Likelihood():
         backend = emcee.backends.HDFBackend(Defaults.CORNER_PLOT_FORMAT.format(galaxyName=self.gs.galaxyName,
                                                                                nyear=str(self.N_yr)))
         backend.reset(nwalkers, ndim)
-        sampler = emcee.EnsembleSampler(nwalkers, ndim, self.log_probability, backend=backend)
-        sampler.run_mcmc(pos, Nstep, progress=True)
+        self._check_likelihood_cache()
+        cached = (self._lnL_norm_sum, self._w_resid0_cut, self._w_diff_cut, self._w_half_inv_var_cut)
+
+        if mp_cpus > 1:
+            with Pool(mp_cpus) as pool:
+                sampler = emcee.EnsembleSampler(nwalkers, ndim, _mcmc_log_probability, args=(cached,),
+                                                backend=backend, pool=pool)
+                sampler.run_mcmc(pos, Nstep, progress=True)
+        else:
+            sampler = emcee.EnsembleSampler(nwalkers, ndim, _mcmc_log_probability_batch, args=(cached,),
+                                            backend=backend, vectorize=True)
+            sampler.run_mcmc(pos, Nstep, progress=True)
 
     def plotMCMCchain(self, ndim, labels, truths, plotChain=False):
         """Plot the results of a Markov Chain Monte Carlo
@@ -1097,6 +1374,9 @@ class Likelihood():
         truths : `array`
             The MC truth values
         """
+        import emcee
+        import corner
+        import matplotlib.pyplot as plt
 
         reader = emcee.backends.HDFBackend(Defaults.CORNER_PLOT_FORMAT.format(galaxyName=self.gs.galaxyName,
                                                                               nyear=str(self.N_yr)))
@@ -1119,13 +1399,18 @@ class Likelihood():
         fig = corner.corner(flat_samples, labels=labels, truths=truths)
         fig.savefig(os.path.join(Defaults.NUXGAL_PLOT_DIR, 'Fig_MCMCcorner.pdf'))
 
-def bootstrap_worker(flatevt, galaxy_sample, idx_mask, ebin, acceptance):
+def bootstrap_worker(pixels, galaxy_sample, idx_mask, ebin, acceptance, rng=None):
 
-    ns2 = NeutrinoSample()
-    idx = np.random.choice(len(flatevt), size=len(flatevt))
-    newevt = flatevt[idx]
+    # resample the events with replacement, from the global random state unless a Generator is given
+    if rng is None:
+        idx = np.random.randint(len(pixels), size=len(pixels))
+    else:
+        idx = rng.integers(len(pixels), size=len(pixels))
+    countsmap = np.zeros((Defaults.NEbin, Defaults.NPIXEL))
+    countsmap[ebin] = np.bincount(pixels[idx], minlength=Defaults.NPIXEL)
 
-    ns2.inputTrial([[newevt]])
+    ns2 = NeutrinoSample()
+    ns2.inputCountsmap(countsmap)
     ns2.updateMask(idx_mask)
     # suppress invalid value warning which we get because of
     #  the energy bin filter
@@ -1133,3 +1418,14 @@ def bootstrap_worker(flatevt, galaxy_sample, idx_mask, ebin, acceptance):
         warnings.simplefilter("ignore")
         cl = ns2.getCrossCorrelationEbin(galaxy_sample, ebin, acceptance)
     return cl
+
+
+def _bootstrap_init(pixels, galaxy_sample, idx_mask, ebin, acceptance):
+    global _bootstrap_args
+    _bootstrap_args = (pixels, galaxy_sample, idx_mask, ebin, acceptance)
+
+
+def _bootstrap_task(seed):
+    # each task gets its own seed, otherwise forked workers
+    # would draw identical resamples
+    return bootstrap_worker(*_bootstrap_args, rng=np.random.default_rng(seed))
@@ -1,8 +1,10 @@
 """Classes for signal and background models"""
 
 import os
+import multiprocessing
 
 from . import Defaults
+from . import file_utils
 from .CskyEventGenerator import CskyEventGenerator
 from .NeutrinoSample import NeutrinoSample
 
@@ -18,6 +20,64 @@ except ImportError:
     print('classy not installed, cannot compute analytic models but can load')
 
 
+def _trial_worker_init(trial_func):
+    # the pool is always forked (see mean_std_of_trials), so the trial
+    # function, and the event generator it holds, is inherited by the
+    # worker rather than pickled
+    global _trial_func
+    _trial_func = trial_func
+
+
+def _trial_worker(seed):
+    # forked workers share the parent random state, reseed for each trial
+    np.random.seed(seed)
+    return _trial_func()
+
+
+def _welford_mean_std(results, N_re):
+    """Mean and standard deviation of the N_re trials yielded by results"""
+    w_mean = 0.
+    w_m2 = 0.
+    for n, w in enumerate(tqdm(results, total=N_re), start=1):
+        delta = w - w_mean
+        w_mean = w_mean + delta / n
+        w_m2 = w_m2 + delta * (w - w_mean)
+    return w_mean, np.sqrt(w_m2 / N_re)
+
+
+def mean_std_of_trials(trial_func, N_re, mp_cpus=1):
+    """Compute the mean and standard deviation of repeated trials
+
+    The statistics are accumulated with Welford's algorithm, so the
+    individual trials are never stored.  The trial functions are
+    closures that cannot be pickled, so with mp_cpus > 1 the workers
+    are forked whatever the default start method of the platform is
+
+    Parameters
+    ----------
+    trial_func : `callable`
+        Function with no arguments returning the result of one trial
+    N_re : `int`
+        Number of trials
+    mp_cpus : `int`
+        Number of processes to run the trials in
+
+    Returns
+    -------
+    mean : `np.ndarray`
+        Mean of the trials
+    std : `np.ndarray`
+        Standard deviation of the trials
+    """
+    if mp_cpus > 1:
+        seeds = np.random.randint(2**31, size=N_re)
+        ctx = multiprocessing.get_context('fork')
+        with ctx.Pool(mp_cpus, initializer=_trial_worker_init, initargs=(trial_func,)) as pool:
+            return _welford_mean_std(pool.imap_unordered(_trial_worker, seeds), N_re)
+
+    return _welford_mean_std((trial_func() for _ in range(N_re)), N_re)
+
+
 class Model(object):
     """Base class for signal and background models"""
 
@@ -28,7 +88,8 @@ class Model(object):
                  save_model=True,
                  recompute=False,
                  gamma=2.5,
-                 path_sig=''):
+                 path_sig='',
+                 mp_cpus=1):
         self.galaxy_sample = galaxy_sample
         self.name = galaxy_sample.galaxyName
         self.N_yr = N_yr
@@ -37,6 +98,7 @@ class Model(object):
         self.idx_mask = idx_mask
         self.gamma = gamma
         self.path_sig = path_sig
+        self.mp_cpus = mp_cpus
         self.pretty_name = '{galaxyName}-{nyear}yr'.format(
             galaxyName=self.name,
             nyear=self.N_yr)
@@ -83,8 +145,8 @@ class Model(object):
         np.save(self.w_std_fname, self.w_std)
 
     def load_model(self):
-        self.w_mean = np.load(self.w_mean_fname)
-        self.w_std = np.load(self.w_std_fname)
+        self.w_mean = file_utils.load_npy(self.w_mean_fname)
+        self.w_std = file_utils.load_npy(self.w_std_fname)
 
     def get_event_generator(self, mc_background=False):
         if not hasattr(self, 'event_generator'):
@@ -103,11 +165,21 @@ class Model(object):
 
 class GalaxyModel(Model):
     method_type = 'galaxy'
+    # w_mean only depends on the galaxy sample and the mask, shared between instances
+    _w_mean_cache = {}
 
     def calc_w_mean(self, N_re=500):
-        fsky = 1 - len(self.idx_mask[0]) / Defaults.NPIXEL
-        w_cross = hp.anafast(self.galaxy_sample.overdensity, lmax=Defaults.MAX_L) / fsky
-        self.w_mean = np.array([w_cross for i in range(Defaults.NEbin)]) - 4 * np.pi * fsky / self.galaxy_sample.galaxymap.sum()
+        gs = self.galaxy_sample
+        key = (gs.galaxyName, self.idx_mask[0].tobytes())
+        if key not in self._w_mean_cache:
+            fsky = 1 - len(self.idx_mask[0]) / Defaults.NPIXEL
+            # same as anafast of the overdensity map, but reuses the alm of the galaxy sample
+            w_cross = hp.alm2cl(gs.overdensityalm) * gs.f_sky**2 / fsky
+            w_cross -= 4 * np.pi * fsky / gs.galaxymap.sum()
+            # every energy bin has the same model, a read-only view repeats the row
+            w_mean = np.broadcast_to(w_cross, (Defaults.NEbin,) + w_cross.shape)
+            self._w_mean_cache[key] = w_mean
+        self.w_mean = self._w_mean_cache[key]
         self.w_std = np.zeros_like(self.w_mean)
 
 
@@ -115,24 +187,20 @@ class TemplateModel(Model):
     method_type = 'template'
 
     def calc_w_mean(self, N_re=500):
-        w_cross = np.zeros((N_re, Defaults.NEbin, 3 * Defaults.NSIDE))
         ns = NeutrinoSample()
         eg = self.get_event_generator()
+        # the acceptance only depends on the analysis, not on the trial
+        acceptance = ns.calc_effective_area(eg.ana)
 
-        for iteration in tqdm(np.arange(N_re)):
-
+        def one_trial():
             trial, _ = eg.SyntheticTrial(1000000,
                                          keep_total_constant=False,
                                          signal_only=True)
             ns.inputTrial(trial, ana=eg.ana)
             ns.updateMask(self.idx_mask)
-            if iteration == 0:
-                acceptance = ns.calc_effective_area(eg.ana)
-            w_cross[iteration] = ns.getCrossCorrelation(self.galaxy_sample, acceptance=acceptance)
+            return ns.getCrossCorrelation(self.galaxy_sample, acceptance=acceptance)
 
-        self.w_trials = w_cross.copy()
-        self.w_mean = np.mean(w_cross, axis=0)
-        self.w_std = np.std(w_cross, axis=0)
+        self.w_mean, self.w_std = mean_std_of_trials(one_trial, N_re, mp_cpus=self.mp_cpus)
 
 
 class AnalyticSignalModel(Model):
@@ -175,13 +243,13 @@ class AnalyticSignalModel(Model):
         self.bl = np.zeros((Defaults.NEbin, Defaults.NCL))
         self.bl_fnames = []
         for ebin in range(Defaults.NEbin):
-            bl_fname = Defaults.BEAM_FNAME_FORMAT.format(year='ps_v4', ebin=ebin)
+            bl_fname = Defaults.beam_fname('ps_v4', ebin)
             self.bl_fnames.append(bl_fname)
-            self.bl[ebin] = np.load(bl_fname)
+            self.bl[ebin] = file_utils.load_npy(bl_fname)
 
         pixwin = hp.pixwin(Defaults.NSIDE)
         self.w_mean = cls_dens['dd'][0] * pixwin**2
-        self.w_mean = np.array([self.w_mean * self.bl[i] for i in range(Defaults.NEbin)])
+        self.w_mean = self.w_mean * self.bl
         self.w_std = np.zeros_like(self.w_mean) * np.nan
         self.w_std = np.array([self.w_std for i in range(Defaults.NEbin)])
 
@@ -191,25 +259,22 @@ class DataScrambleBackgroundModel(Model):
     gamma = 2.5
 
     def calc_w_mean(self, N_re=500, estimator='anafast', ana=None):
-        w_cross = np.zeros((N_re, Defaults.NEbin, 3 * Defaults.NSIDE))
         ns = NeutrinoSample()
         eg = self.get_event_generator()
+        if estimator == 'anafast':
+            # the acceptance only depends on the analysis, not on the trial
+            acceptance = ns.calc_effective_area(eg.ana)
 
-        for iteration in tqdm(np.arange(N_re)):
-
+        def one_trial():
             trial, _ = eg.SyntheticTrial(0)
             ns.inputTrial(trial, ana=eg.ana)
             ns.updateMask(self.idx_mask)
             if estimator == 'anafast':
-                acceptance = ns.calc_effective_area(eg.ana)
-                w_cross[iteration] = ns.getCrossCorrelation(self.galaxy_sample, acceptance=acceptance)
+                return ns.getCrossCorrelation(self.galaxy_sample, acceptance=acceptance)
             elif estimator == 'polspice':
-                w_cross[iteration] = ns.getCrossCorrelationPolSpice(self.galaxy_sample, ana)
-
+                return ns.getCrossCorrelationPolSpice(self.galaxy_sample, ana)
 
-        self.w_trials = w_cross.copy()
-        self.w_mean = np.mean(w_cross, axis=0)
-        self.w_std = np.std(w_cross, axis=0)
+        self.w_mean, self.w_std = mean_std_of_trials(one_trial, N_re, mp_cpus=self.mp_cpus)
 
 
 class MCScrambleBackgroundModel(Model):
@@ -241,7 +306,7 @@ class MCScrambleBackgroundModel(Model):
                 dec = np.concatenate(dec)
                 weight = np.concatenate(weight)
                 pixels = hp.ang2pix(Defaults.NSIDE, np.degrees(ra), np.degrees(dec), lonlat=True)
-                nu_map[i] += np.histogram(pixels, bins=Defaults.NPIXEL, weights=weight)[0]
+                nu_map[i] += np.bincount(pixels, weights=weight, minlength=Defaults.NPIXEL)
 
         ns = NeutrinoSample()
         ns.inputCountsmap(nu_map)
@@ -383,7 +448,9 @@ class DataHistogramBackgroundModel(Model):
 
     def calc_w_mean(self, N_re=500):
         self._make_histogram()
-        w_cross = np.zeros((N_re, Defaults.NEbin, 3 * Defaults.NSIDE))
+        # the trials are kept for w_trials, in single precision since their
+        # spread is set by the number of events, not by the float precision
+        w_cross = np.zeros((N_re, Defaults.NEbin, 3 * Defaults.NSIDE), dtype=np.float32)
         ns = NeutrinoSample()
 
         for iteration in tqdm(np.arange(N_re)):
@@ -394,9 +461,9 @@ class DataHistogramBackgroundModel(Model):
             acceptance = ns.calc_effective_area(eg.ana)
             w_cross[iteration] = ns.getCrossCorrelation(self.galaxy_sample, acceptance=acceptance)
 
-        self.w_trials = w_cross.copy()
-        self.w_mean = np.mean(w_cross, axis=0)
-        self.w_std = np.std(w_cross, axis=0)
+        self.w_trials = w_cross
+        self.w_mean = np.mean(w_cross, axis=0, dtype=np.float64)
+        self.w_std = np.std(w_cross, axis=0, dtype=np.float64)
 
 
 class FlatBackgroundModel(Model):
@@ -14,6 +14,7 @@ from astropy.io import fits
 from . import Defaults
 
 from . import file_utils
+from . import hp_utils
 
 from .Exposure import ICECUBE_EXPOSURE_LIBRARY
 
@@ -34,9 +35,9 @@ class NeutrinoSample():
         self.bl = np.zeros((Defaults.NEbin, Defaults.NCL))
         self.bl_fnames = []
         for ebin in range(Defaults.NEbin):
-            bl_fname = Defaults.BEAM_FNAME_FORMAT.format(year=nyr, ebin=ebin)
+            bl_fname = Defaults.beam_fname(nyr, ebin)
             self.bl_fnames.append(bl_fname)
-            self.bl[ebin] = np.load(bl_fname)
+            self.bl[ebin] = file_utils.load_npy(bl_fname)
 
     def inputTrial(self, trial, ana):
         self.event_list = trial
@@ -46,21 +47,19 @@ class NeutrinoSample():
 
     def countsMap(self):
         countsmap = np.zeros((Defaults.NEbin, Defaults.NPIXEL))
-        for i in range(Defaults.NEbin):
-            for evt in self.event_list:
-                for tr in evt:
+        for evt in self.event_list:
+            for tr in evt:
+                # pixelize each trial once, then count per energy bin
+                loge = tr['log10energy']
+                pixels = hp.ang2pix(Defaults.NSIDE, np.degrees(tr['ra']), np.degrees(tr['dec']), lonlat=True)
+                for i in range(Defaults.NEbin):
                     elo = Defaults.map_logE_edge[i]
                     ehi = Defaults.map_logE_edge[i + 1]
-                    idx = (tr['log10energy'] > elo) * (tr['log10energy'] < ehi)
-                    ra = np.degrees(tr['ra'][idx])
-                    dec = np.degrees(tr['dec'][idx])
-                    loge = tr['log10energy'][idx]
-                    #area = self.lookup_aeff(np.sin(np.radians(dec)), loge)
-                    #energy = 10**loge
-                    pixels = hp.ang2pix(Defaults.NSIDE, ra, dec, lonlat=True)
-                    bins = np.arange(Defaults.NPIXEL+1)
-                    #countsmap[i] += np.histogram(pixels, bins=bins, weights=energy/area)[0]
-                    countsmap[i] += np.histogram(pixels, bins=bins)[0]
+                    idx = (loge > elo) * (loge < ehi)
+                    #area = self.lookup_aeff(np.sin(tr['dec'][idx]), loge[idx])
+                    #energy = 10**loge[idx]
+                    #countsmap[i] += np.bincount(pixels[idx], weights=energy/area, minlength=Defaults.NPIXEL)
+                    countsmap[i] += np.bincount(pixels[idx], minlength=Defaults.NPIXEL)
         self.countsmap = countsmap
 
     def build_aeff_matrix(self, ana):
@@ -161,13 +160,13 @@ class NeutrinoSample():
     def getAlm(self):
         """Compute and return the alms"""
         overdensity = self.getOverdensity()
-        alm = [hp.sphtfunc.map2alm(overdensity[i]) for i in range(Defaults.NEbin)]
+        alm = [hp_utils.map2alm(overdensity[i]) for i in range(Defaults.NEbin)]
         return alm
 
     def getPowerSpectrum(self):
         """Compute and return the power spectrum of the neutirno sample"""
         overdensity = self.getOverdensity()
-        w_auto = [hp.sphtfunc.anafast(overdensity[i]) / self.f_sky for i in range(Defaults.NEbin)]
+        w_auto = [hp.sphtfunc.anafast(overdensity[i], iter=Defaults.ALM_ITER) / self.f_sky for i in range(Defaults.NEbin)]
         return w_auto
 
     def getCrossCorrelation(self, galaxy_sample, acceptance=None):
@@ -187,11 +186,13 @@ class NeutrinoSample():
         if acceptance is None:
             acceptance = np.ones_like(self.countsmap)
         countsmap = self.countsmap / acceptance
-        overdensity_nu = [countsmap[i] / countsmap[i].mean() - 1. for i in range(Defaults.NEbin)]
+        # the overdensity of all the energy bins is computed at once,
+        # map2alm still transforms each energy bin map separately
+        overdensity_nu = countsmap / countsmap.mean(axis=1)[:, np.newaxis] - 1.
+        overdensityalm_nu = hp_utils.map2alm(overdensity_nu)
         w_cross = np.zeros((Defaults.NEbin, Defaults.NCL))
         for i in range(Defaults.NEbin):
-            overdensityalm_nu = hp.map2alm(overdensity_nu[i])
-            w_cross[i] = hp.alm2cl(overdensityalm_nu, galaxy_sample.overdensityalm, lmax=Defaults.MAX_L) / self.f_sky
+            w_cross[i] = hp.alm2cl(overdensityalm_nu[i], galaxy_sample.overdensityalm, lmax=Defaults.MAX_L) / self.f_sky
         return w_cross
 
     def getCrossCorrelationEbin(self, galaxy_sample, ebin, acceptance=None):
@@ -210,9 +211,10 @@ class NeutrinoSample():
 
         if acceptance is None:
             acceptance = np.ones_like(self.countsmap)
-        countsmap = self.countsmap / acceptance
-        overdensity_nu = [countsmap[i] / countsmap[i].mean() - 1. for i in range(Defaults.NEbin)]
-        overdensityalm_nu = hp.map2alm(overdensity_nu[ebin])
+        # only the requested energy bin is needed
+        countsmap = self.countsmap[ebin] / acceptance[ebin]
+        overdensity_nu = countsmap / countsmap.mean() - 1.
+        overdensityalm_nu = hp_utils.map2alm(overdensity_nu)
         overdensityalm_gal = galaxy_sample.overdensityalm
         w_cross = hp.sphtfunc.alm2cl(overdensityalm_nu, overdensityalm_gal, lmax=Defaults.MAX_L) / self.f_sky# / self.bl[ebin] / pix_window ** 2
         return w_cross
@@ -1,5 +1,8 @@
 """Utility function for reading and writing files"""
 
+import os
+import functools
+
 import numpy as np
 
 import healpy as hp
@@ -9,6 +12,54 @@ from . import Defaults
 from .hp_utils import reshape_array_to_2d
 
 
+@functools.lru_cache(maxsize=None)
+def _load_npy_cached(filepath, mtime):
+    arr = np.load(filepath)
+    arr.setflags(write=False)
+    return arr
+
+
+@functools.lru_cache(maxsize=None)
+def _load_txt_cached(filepath, mtime):
+    arr = np.loadtxt(filepath)
+    arr.setflags(write=False)
+    return arr
+
+
+def load_npy(filepath):
+    """Load an array saved with `np.save`, reading each file only once per process
+
+    Parameters
+    ----------
+    filepath : `str`
+        Path to the .npy file
+
+    Returns
+    -------
+    arr : `np.ndarray`
+        The array, shared between callers and so flagged read-only.
+        The file is read again if it has been modified since.
+    """
+    return _load_npy_cached(filepath, os.path.getmtime(filepath))
+
+
+def load_txt(filepath):
+    """Load an array from a text file, parsing each file only once per process
+
+    Parameters
+    ----------
+    filepath : `str`
+        Path to the text file
+
+    Returns
+    -------
+    arr : `np.ndarray`
+        The array, shared between callers and so flagged read-only.
+        The file is parsed again if it has been modified since.
+    """
+    return _load_txt_cached(filepath, os.path.getmtime(filepath))
+
+
 def read_cls_from_txt(fileformat, nmap=1, ncl=500):
     """Read a set of cls or series of sets of cls from text files
 
@@ -1,9 +1,80 @@
 """Utility function for healpy, mainly to vectorize calls to healpy.sphtfunc"""
 
+import functools
+
 import numpy as np
 
 import healpy as hp
 
+try:
+    import ducc0
+except ImportError:
+    ducc0 = None
+
+from . import Defaults
+
+
+@functools.lru_cache(maxsize=None)
+def _ducc0_geometry(nside):
+    """Ring geometry of a RING ordered healpix map, as used by ducc0.sht"""
+    return ducc0.healpix.Healpix_Base(nside, "RING").sht_info()
+
+
+def map2alm(maps, lmax=None, iter=None, nthreads=None):
+    """Drop-in for `healpy.map2alm` of spin 0 maps, using ducc0 when it is installed
+
+    The ducc0 transforms are multithreaded and faster than the healpy ones,
+    the same Jacobi iterations as healpy are applied to refine the alm
+
+    Parameters
+    ----------
+    maps : `np.array`
+        A map or a stack of maps, the last axis runs over the pixels.
+        UNSEEN pixels are treated as zero, as in healpy
+    lmax : `int`
+        Maximum l of the alm, defaults to 3 nside - 1
+    iter : `int`
+        Number of iterations of the alm estimate, defaults to `Defaults.ALM_ITER`
+    nthreads : `int`
+        Number of threads used by ducc0, defaults to `Defaults.SHT_NTHREADS`
+
+    Returns
+    -------
+    alm : `np.array`
+        alm coefficients, with the same leading axes as maps
+    """
+    if iter is None:
+        iter = Defaults.ALM_ITER
+    if ducc0 is None:
+        if np.ndim(maps) == 1:
+            return hp.map2alm(maps, lmax=lmax, iter=iter)
+        maps_2d = reshape_array_to_2d(maps)
+        alms = np.array([hp.map2alm(map_1d, lmax=lmax, iter=iter) for map_1d in maps_2d])
+        return alms.reshape(np.shape(maps)[:-1] + alms.shape[-1:])
+
+    if nthreads is None:
+        nthreads = Defaults.SHT_NTHREADS
+    maps = hp.pixelfunc.ma_to_array(maps)
+    maps = np.where(hp.mask_bad(maps), 0., maps).astype(np.float64)
+    npix = maps.shape[-1]
+    nside = hp.npix2nside(npix)
+    if lmax is None:
+        lmax = 3 * nside - 1
+    geom = _ducc0_geometry(nside)
+    pix_area = 4 * np.pi / npix
+
+    maps_2d = reshape_array_to_2d(maps)
+    alms = np.empty((maps_2d.shape[0], hp.Alm.getsize(lmax)), dtype=np.complex128)
+    for i, map_1d in enumerate(maps_2d):
+        map_1d = map_1d.reshape(1, -1)
+        alm = ducc0.sht.adjoint_synthesis(map=map_1d, lmax=lmax, spin=0, nthreads=nthreads, **geom) * pix_area
+        for _ in range(iter):
+            resid = map_1d - ducc0.sht.synthesis(alm=alm, lmax=lmax, spin=0, nthreads=nthreads, **geom)
+            alm += ducc0.sht.adjoint_synthesis(map=resid, lmax=lmax, spin=0, nthreads=nthreads, **geom) * pix_area
+        alms[i] = alm[0]
+    return alms.reshape(maps.shape[:-1] + alms.shape[-1:])
+
+
 def cl_to_alm_no_phi(cl, nalm):
     """Convert cl to alm, assuming no phi dependence
 
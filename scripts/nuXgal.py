@@ -65,8 +65,15 @@ def main():
     parser.add_argument('--mcbg', action='store_true',
                         help='Use MC background instead of data scramble')
     parser.add_argument('--fit-bounds', action='store_true')
+    parser.add_argument('--nthreads', default=1, type=int,
+                        help='Threads for spherical harmonic transforms, requires ducc0')
+    parser.add_argument('--alm-iter', default=Defaults.ALM_ITER, type=int,
+                        help='Jacobi iterations of the alm estimate, the models must be computed with the same value')
     args = parser.parse_args()
 
+    Defaults.SHT_NTHREADS = args.nthreads
+    Defaults.ALM_ITER = args.alm_iter
+
     if args.fit_bounds:
         fit_bounds = [0, 1]
     else:
@@ -102,71 +109,57 @@ def main():
 
     result_list = []
 
+    # the entries that do not change from trial to trial
+    base_results = {
+        'dof': Defaults.MAX_L-llh.lmin-1,
+        'gamma': args.gamma,
+        'ebinmin': args.ebinmin,
+        'ebinmax': args.ebinmax,
+        'logemin': Defaults.map_logE_edge[args.ebinmin],
+        'logemax': Defaults.map_logE_edge[args.ebinmax],
+        'galaxy_catalog': args.galaxy_catalog,
+        'lmin': args.lmin,
+        'N_yr': args.nyear,
+        'bootstrap_niter': args.bootstrap_niter,
+        'err-type': args.err_type,
+        'lbin': args.lbin}
+    ebins = range(args.ebinmin, args.ebinmax)
+    flux_per_event = eg.trial_runner.to_dNdE(1, E0=1e5, gamma=2.5) / (4*np.pi*llh.f_sky)
+
+    def count_results(results, trial):
+        ncount = llh.Ncount[args.ebinmin:args.ebinmax]
+        n_inj_i = find_n_inj_per_bin(trial, args.ebinmin, args.ebinmax)
+        results['n_total'] = int(np.sum(llh.Ncount))
+        results['n_total_i'] = dict(zip(ebins, ncount.astype(int).tolist()))
+        results['n_inj_i'] = dict(zip(ebins, n_inj_i))
+        results['f_inj_i'] = dict(zip(ebins, (n_inj_i/ncount).tolist()))
+        results['f_inj'] = float(results['n_inj'] / results['n_total'])
+
     if args.unblind:
         trial, nexc = llh.event_generator.trial_runner.get_one_trial(TRUTH=True)
-        results = {}
-        results['dof'] = Defaults.MAX_L-llh.lmin-1
-        results['gamma'] = args.gamma
-        results['ebinmin'] = args.ebinmin
-        results['ebinmax'] = args.ebinmax
-        results['logemin'] = Defaults.map_logE_edge[args.ebinmin]
-        results['logemax'] = Defaults.map_logE_edge[args.ebinmax]
-        results['galaxy_catalog'] = args.galaxy_catalog
-        results['lmin'] = args.lmin
-        results['N_yr'] = args.nyear
-        results['bootstrap_niter'] = args.bootstrap_niter
-        results['err-type'] = args.err_type
-        results['lbin'] = args.lbin
-
-        crosscorr_results = crosscorr_analysis(llh, trial, args)
-        crosscorr_results['flux_fit'] = eg.trial_runner.to_dNdE(np.sum(crosscorr_results['n_fit']), E0=1e5, gamma=2.5) / (4*np.pi*llh.f_sky)
-        for key in crosscorr_results:
-            results[key] = crosscorr_results[key]
+        results = dict(base_results)
 
-        results['n_total'] = int(np.sum(llh.Ncount))
-        results['n_total_i'] = dict(zip(range(args.ebinmin, args.ebinmax), llh.Ncount[args.ebinmin:args.ebinmax].astype(int).tolist()))
-        results['n_inj_i'] = dict(zip(range(args.ebinmin, args.ebinmax), find_n_inj_per_bin(trial, args.ebinmin, args.ebinmax)))
-        results['f_inj_i'] = dict(zip(range(args.ebinmin, args.ebinmax), (find_n_inj_per_bin(trial, args.ebinmin, args.ebinmax)/llh.Ncount[args.ebinmin:args.ebinmax]).tolist()))
-        results['f_inj'] = float(results['n_inj'] / results['n_total'])
+        results.update(crosscorr_analysis(llh, trial, args))
+        results['flux_fit'] = np.sum(results['n_fit']) * flux_per_event
 
+        count_results(results, trial)
         result_list.append(results)
 
     else:
         for n_inject in args.n_inject:
+            base_results['n_inj'] = n_inject
+            base_results['flux_inj'] = n_inject * flux_per_event
             for i in tqdm(range(args.n_trials)):
-                results = {}
                 trial, nexc = llh.event_generator.SyntheticTrial(n_inject, keep_total_constant=False)
-                results['dof'] = Defaults.MAX_L-llh.lmin-1
-                results['n_inj'] = n_inject
-                results['flux_inj'] = trial_runner.to_dNdE(n_inject, E0=1e5, gamma=2.5) / (4*np.pi*llh.f_sky)
-                results['gamma'] = args.gamma
-                results['ebinmin'] = args.ebinmin
-                results['ebinmax'] = args.ebinmax
-                results['logemin'] = Defaults.map_logE_edge[args.ebinmin]
-                results['logemax'] = Defaults.map_logE_edge[args.ebinmax]
-                results['galaxy_catalog'] = args.galaxy_catalog
-                results['lmin'] = args.lmin
-                results['N_yr'] = args.nyear
-                results['bootstrap_niter'] = args.bootstrap_niter
-                results['err-type'] = args.err_type
-                results['lbin'] = args.lbin
-
-                crosscorr_results = crosscorr_analysis(llh, trial, args)
-                crosscorr_results['flux_fit'] = eg.trial_runner.to_dNdE(np.sum(crosscorr_results['n_fit']), E0=1e5, gamma=2.5) / (4*np.pi*llh.f_sky)
-                for key in crosscorr_results:
-                    results[key] = crosscorr_results[key]
-
-                template_results = template_analysis(trial, nexc, eg.trial_runner)
-                template_results['template_flux_fit'] = eg.trial_runner.to_dNdE(template_results['template_n_fit'], E0=1e5, gamma=2.5) / (4*np.pi*llh.f_sky)
-                for key in template_results:
-                    results[key] = template_results[key]
-
-                results['n_total'] = int(np.sum(llh.Ncount))
-                results['n_total_i'] = dict(zip(range(args.ebinmin, args.ebinmax), llh.Ncount[args.ebinmin:args.ebinmax].astype(int).tolist()))
-                results['n_inj_i'] = dict(zip(range(args.ebinmin, args.ebinmax), find_n_inj_per_bin(trial, args.ebinmin, args.ebinmax)))
-                results['f_inj_i'] = dict(zip(range(args.ebinmin, args.ebinmax), (find_n_inj_per_bin(trial, args.ebinmin, args.ebinmax)/llh.Ncount[args.ebinmin:args.ebinmax]).tolist()))
-                results['f_inj'] = float(results['n_inj'] / results['n_total'])
+                results = dict(base_results)
+
+                results.update(crosscorr_analysis(llh, trial, args))
+                results['flux_fit'] = np.sum(results['n_fit']) * flux_per_event
+
+                results.update(template_analysis(trial, nexc, eg.trial_runner))
+                results['template_flux_fit'] = results['template_n_fit'] * flux_per_event
 
+                count_results(results, trial)
                 result_list.append(results)
 
     with open(args.output, 'w') as fp:
@@ -39,6 +39,6 @@ setup(
         'pandas'
     ],
     extras_require=dict(
-        all=[],
+        all=['numba', 'ducc0'],
     ),
 )
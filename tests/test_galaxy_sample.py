@@ -0,0 +1,36 @@
+"""Check that the galaxy overdensity alm are unchanged from the healpy baseline"""
+
+import numpy as np
+import pytest
+
+import healpy as hp
+
+from KIPAC.nuXgal import Defaults
+from KIPAC.nuXgal import hp_utils
+from KIPAC.nuXgal.GalaxySample import GalaxySample
+
+
+@pytest.mark.parametrize('use_ducc0', [True, False])
+def test_overdensityalm_matches_healpy(tmp_path, monkeypatch, use_ducc0):
+    if use_ducc0:
+        pytest.importorskip('ducc0')
+    else:
+        monkeypatch.setattr(hp_utils, 'ducc0', None)
+
+    rng = np.random.default_rng(1234)
+    galaxymap = rng.poisson(20., size=Defaults.NPIXEL).astype(float)
+    hp.write_map(str(tmp_path / 'test_galaxymap.fits'), galaxymap)
+    monkeypatch.setattr(Defaults, 'GALAXYMAP_FORMAT', str(tmp_path / '{galaxyName}_galaxymap.fits'))
+
+    theta, _ = hp.pix2ang(Defaults.NSIDE, np.arange(Defaults.NPIXEL))
+    idx_mask = np.where(np.abs(np.pi / 2 - theta) < np.radians(10.))
+    gs = GalaxySample('test', idx_mask)
+
+    # the baseline computation, before the alm went through hp_utils.map2alm
+    masked = galaxymap.copy()
+    masked[idx_mask] = hp.UNSEEN
+    masked = hp.ma(masked)
+    f_sky = 1. - len(idx_mask[0]) / float(Defaults.NPIXEL)
+    alm_ref = hp.map2alm(masked / masked.mean() - 1., lmax=Defaults.MAX_L) / f_sky
+
+    np.testing.assert_allclose(gs.overdensityalm, alm_ref, rtol=0, atol=1e-10 * np.abs(alm_ref).max())
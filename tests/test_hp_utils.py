@@ -0,0 +1,52 @@
+"""Check that the ducc0 map2alm matches healpy"""
+
+import numpy as np
+import pytest
+
+import healpy as hp
+
+from KIPAC.nuXgal import hp_utils
+
+NSIDE = 16
+
+
+def _assert_alm_close(alm, alm_ref):
+    np.testing.assert_allclose(alm, alm_ref, rtol=0, atol=1e-10 * np.abs(alm_ref).max())
+
+
+@pytest.fixture
+def maps():
+    rng = np.random.default_rng(1234)
+    return rng.poisson(10., size=(3, hp.nside2npix(NSIDE))) / 10. - 1.
+
+
+@pytest.mark.parametrize('iter', [0, 3])
+def test_map2alm_ducc0_single(maps, iter):
+    pytest.importorskip('ducc0')
+    alm = hp_utils.map2alm(maps[0], iter=iter)
+    _assert_alm_close(alm, hp.map2alm(maps[0], iter=iter))
+
+
+def test_map2alm_ducc0_stack(maps):
+    pytest.importorskip('ducc0')
+    lmax = 2 * NSIDE
+    alm = hp_utils.map2alm(maps, lmax=lmax, iter=3)
+    assert alm.shape == (3, hp.Alm.getsize(lmax))
+    for alm_i, map_i in zip(alm, maps):
+        _assert_alm_close(alm_i, hp.map2alm(map_i, lmax=lmax, iter=3))
+
+
+def test_map2alm_ducc0_masked(maps):
+    pytest.importorskip('ducc0')
+    masked = maps[0].copy()
+    masked[:hp.nside2npix(NSIDE) // 4] = hp.UNSEEN
+    masked = hp.ma(masked)
+    alm = hp_utils.map2alm(masked, iter=3)
+    _assert_alm_close(alm, hp.map2alm(masked, iter=3))
+
+
+def test_map2alm_healpy_fallback(maps, monkeypatch):
+    monkeypatch.setattr(hp_utils, 'ducc0', None)
+    alm = hp_utils.map2alm(maps, iter=3)
+    for alm_i, map_i in zip(alm, maps):
+        _assert_alm_close(alm_i, hp.map2alm(map_i, iter=3))